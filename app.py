@@ -1,71 +1,103 @@
 import streamlit as st
-import json
+import orjson
 import re
-from collections import defaultdict
-import pandas as pd
+import sys
+try:
+    import ijson.backends.yajl2_c as ijson
+except ImportError:
+    import ijson
+from ijson.common import JSONError
+from collections import defaultdict, deque
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font
-import requests
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import matplotlib.pyplot as plt
-import plotly.express as px
+import xlsxwriter
+import asyncio
 
 st.set_page_config(page_title="API Explorer", layout="wide")
 st.title("🔍 API Structure Explorer & Load Tester")
 st.markdown("Upload a **Postman Collection** or **OpenAPI/Swagger JSON** file to explore APIs, view env variables, and test performance.")
 
+_VAR_RE = re.compile(r"\{\{([^}]*)\}\}")
+_EMPTY_DICT = {}
+_EMPTY_TUPLE = ()
+_DONE = object()
+
+@lru_cache(maxsize=4096)
+def _extract_vars_cached(text):
+    return tuple(_VAR_RE.findall(text))
+
 def extract_variables(text):
-    return re.findall(r"{{(.*?)}}", text) if isinstance(text, str) else []
+    return _extract_vars_cached(text) if isinstance(text, str) else ()
+
+def intern_key(value):
+    return sys.intern(value) if type(value) is str else value
+
+def detect_format(f):
+    # Stop at the first root "item" or "paths" key; for the rare file that has
+    # both, whichever comes first wins. The keys before it (info, openapi,
+    # servers) are small, so this rarely reads far into the document.
+    for prefix, event, value in ijson.parse(f):
+        if prefix == "" and event == "map_key" and value in ("item", "paths"):
+            return value
+    return None
 
-def parse_postman(data):
+def parse_postman(items):
     folder_api_map = defaultdict(list)
     all_variables = set()
     total = 0
 
-    def traverse(items, path=""):
-        nonlocal total
-        for item in items:
-            name = item.get("name", "Unnamed")
-            if 'request' in item:
-                request = item['request']
-                api_info = {"name": name}
-                variables = set()
-                url = request.get("url", {}).get("raw", "")
-                variables.update(extract_variables(url))
-                api_info["path"] = url
-                for h in request.get("header", []):
-                    variables.update(extract_variables(h.get("value", "")))
-                body = request.get("body", {})
-                if "raw" in body:
-                    raw_body = body.get("raw", "")
-                    variables.update(extract_variables(raw_body))
-                    api_info["body"] = raw_body
-                api_info["variables"] = sorted(list(variables))
-                all_variables.update(variables)
-                folder_api_map[path].append(api_info)
-                total += 1
-            elif 'item' in item:
-                sub_path = f"{path}/{item['name']}" if path else item['name']
-                traverse(item['item'], sub_path)
-
-    traverse(data.get("item", []))
+    stack = deque([(iter(items), "")])
+    while stack:
+        items, path = stack[-1]
+        item = next(items, _DONE)
+        if item is _DONE:
+            stack.pop()
+            continue
+        if not isinstance(item, dict):
+            continue
+        name = item.get("name", "Unnamed")
+        if 'request' in item:
+            request = item['request']
+            api_info = {"name": name, "_name_lc": name.lower()}
+            variables = set()
+            variables_update = variables.update
+            url = (request.get("url") or _EMPTY_DICT).get("raw", "")
+            variables_update(extract_variables(url))
+            api_info["path"] = url
+            for h in request.get("header") or _EMPTY_TUPLE:
+                variables_update(extract_variables(h.get("value", "")))
+            body = request.get("body") or _EMPTY_DICT
+            if "raw" in body:
+                raw_body = body["raw"]
+                # Bodies are rarely repeated and can be large; keep them out of the shared cache
+                if isinstance(raw_body, str):
+                    variables_update(_VAR_RE.findall(raw_body))
+                api_info["body"] = raw_body
+            api_info["variables"] = tuple(variables)
+            all_variables.update(variables)
+            folder_api_map[path].append(api_info)
+            total += 1
+        elif 'item' in item:
+            sub_path = intern_key(f"{path}/{item['name']}" if path else item['name'])
+            stack.append((iter(item['item']), sub_path))
+
     return folder_api_map, total, all_variables
 
-def parse_openapi(data):
+def parse_openapi(paths):
     folder_api_map = defaultdict(list)
     all_variables = set()
     total = 0
 
-    paths = data.get("paths", {})
-    for endpoint, methods in paths.items():
+    for endpoint, methods in paths:
         for method, details in methods.items():
-            tag = details.get("tags", ["Untagged"])[0]
+            tag = intern_key(details.get("tags", ["Untagged"])[0])
             summary = details.get("summary", f"{method.upper()} {endpoint}")
+            name = f"{method.upper()} {endpoint} — {summary}"
             api_info = {
-                "name": f"{method.upper()} {endpoint} — {summary}",
+                "name": name,
+                "_name_lc": name.lower(),
                 "path": endpoint,
                 "variables": extract_variables(endpoint)
             }
@@ -75,67 +107,173 @@ def parse_openapi(data):
             if "application/json" in content:
                 example = content["application/json"].get("example")
                 if example:
-                    api_info["body"] = json.dumps(example, indent=2)
+                    api_info["body"] = orjson.dumps(example, option=orjson.OPT_INDENT_2).decode()
             folder_api_map[tag].append(api_info)
             total += 1
 
     return folder_api_map, total, all_variables
 
-def load_test(api_urls, num_requests=10000, max_workers=100):
-    results = []
-    latencies = []
-    statuses = []
-    progress_bar = st.progress(0)
+def stream_upload(blob):
+    f = BytesIO(blob)
+    file_format = detect_format(f)
+    f.seek(0)
+    if file_format == "item":
+        return file_format, parse_postman(ijson.items(f, "item.item", use_float=True))
+    if file_format == "paths":
+        return file_format, parse_openapi(ijson.kvitems(f, "paths", use_float=True))
+    return file_format, (defaultdict(list), 0, set())
+
+def load_upload(blob):
+    data = orjson.loads(blob)
+    if not isinstance(data, dict):
+        return None, (defaultdict(list), 0, set())
+    file_format = next((key for key in data if key in ("item", "paths")), None)
+    items = data.get("item", [])
+    paths = data.get("paths", {}).items()
+    # Only the item/paths subtrees are walked; release components, info, etc.
+    del data
+    if file_format == "item":
+        return file_format, parse_postman(items)
+    if file_format == "paths":
+        return file_format, parse_openapi(paths)
+    return file_format, (defaultdict(list), 0, set())
 
-    def make_request(url):
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_upload(blob):
+    if ijson.backend == "yajl2_c":
         try:
-            start = time.time()
-            response = requests.get(url)
-            latency = round((time.time() - start) * 1000, 2)
-            latencies.append(latency)
-            statuses.append(response.status_code)
-            return (url, response.status_code, latency)
+            file_format, parsed = stream_upload(blob)
+        except JSONError:
+            # yajl rejects integers wider than 64 bits (e.g. uint64 bounds in components)
+            file_format, parsed = load_upload(blob)
+    else:
+        # ijson's pure-Python backends are far slower than a full orjson parse
+        file_format, parsed = load_upload(blob)
+    folder_api_map, total, all_variables = parsed
+    flat_apis = [(folder, api) for folder, apis in folder_api_map.items() for api in apis]
+    return file_format, folder_api_map, total, all_variables, flat_apis
+
+def filter_apis(flat_apis, search_term):
+    if not search_term:
+        return flat_apis
+    needle = search_term.lower()
+    return [(folder, api) for folder, api in flat_apis if needle in api["_name_lc"]]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def build_api_export(blob, search_term):
+    flat_apis = parse_upload(blob)[4]
+    filtered_apis = filter_apis(flat_apis, search_term)
+    if not filtered_apis:
+        return None
+
+    headers = ("Folder/Tag", "API Name", "API Path", "Env Variables", "Request Body")
+    widths = [len(h) for h in headers]
+    buffer = BytesIO()
+    wb = xlsxwriter.Workbook(buffer, {"constant_memory": True, "strings_to_urls": False, "strings_to_formulas": False})
+    ws = wb.add_worksheet("API Details")
+    ws.write_row(0, 0, headers, wb.add_format({"bold": True}))
+    row_num = 1
+    for folder, api in filtered_apis:
+        row = (
+            folder,
+            api["name"],
+            api.get("path", ""),
+            ", ".join(sorted(api.get("variables", ()))),
+            api.get("body", ""),
+        )
+        ws.write_row(row_num, 0, row)
+        row_num += 1
+        for i, value in enumerate(row):
+            length = len(str(value)) if value else 0
+            if length > widths[i]:
+                widths[i] = length
+    for i, width in enumerate(widths):
+        ws.set_column(i, i, width + 2)
+    wb.close()
+    return buffer.getvalue()
+
+async def fetch(session, semaphore, idx, url):
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            async with session.get(url) as response:
+                await response.read()
+            latency = round((loop.time() - start) * 1000, 2)
+            return idx, (url, response.status, latency)
         except Exception as e:
-            latencies.append(None)
-            statuses.append("ERROR")
-            return (url, "ERROR", str(e))
+            return idx, (url, "ERROR", str(e))
+
+async def run_load_test(api_urls, num_requests, max_workers, progress_bar):
+    import aiohttp
+    import numpy as np
+
+    urls = api_urls * (num_requests // len(api_urls))
+    total = len(urls)
+    results = [None] * total
+    latencies = np.full(total, np.nan, dtype=np.float32)
+    statuses = np.full(total, -1, dtype=np.int16)
+    semaphore = asyncio.Semaphore(max_workers)
+    connector = aiohttp.TCPConnector(limit=max_workers)
+    timeout = aiohttp.ClientTimeout(total=10)
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(make_request, url) for url in api_urls * (num_requests // len(api_urls))]
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [asyncio.create_task(fetch(session, semaphore, i, url)) for i, url in enumerate(urls)]
         completed = 0
-        total = len(futures)
-        for f in as_completed(futures):
-            results.append(f.result())
+        last_pct = -1
+        for task in asyncio.as_completed(tasks):
+            idx, result = await task
+            results[idx] = result
+            if result[1] != "ERROR":
+                statuses[idx] = result[1]
+                latencies[idx] = result[2]
             completed += 1
-            progress_bar.progress(int((completed / total) * 100))
+            pct = completed * 100 // total
+            if pct != last_pct:
+                progress_bar.progress(pct)
+                last_pct = pct
 
     return results, latencies, statuses
 
+def load_test(api_urls, num_requests=10000, max_workers=100):
+    progress_bar = st.progress(0)
+    return asyncio.run(run_load_test(api_urls, num_requests, max_workers, progress_bar))
+
 def plot_results(latencies, statuses):
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+
     st.subheader("📊 Load Test Analysis")
     
+    valid = ~np.isnan(latencies)
+    clean_latencies = latencies[valid]
+
     # Plot Latency Distribution
-    fig = plt.figure(figsize=(10, 5))
-    plt.hist(latencies, bins=50, color='skyblue', edgecolor='black')
-    plt.title("Latency Distribution (ms)")
-    plt.xlabel("Latency (ms)")
-    plt.ylabel("Frequency")
-    st.pyplot(fig)
+    counts, edges = np.histogram(clean_latencies, bins=50)
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = px.bar(x=centers, y=counts, labels={"x": "Latency (ms)", "y": "Frequency"}, title="Latency Distribution (ms)")
+    fig.update_traces(marker_color="skyblue", marker_line_color="black", marker_line_width=1)
+    fig.update_layout(bargap=0)
+    st.plotly_chart(fig)
 
     # Plot Success Rate
-    success_count = statuses.count(200)
-    error_count = len(statuses) - success_count
-    success_rate = (success_count / len(statuses)) * 100
+    success_count = np.count_nonzero(statuses == 200)
+    success_rate = (success_count / statuses.size) * 100
     error_rate = 100 - success_rate
     
     # Pie Chart for Success/Failure Rate
-    fig = plt.figure(figsize=(7, 7))
-    plt.pie([success_rate, error_rate], labels=["Success", "Error"], autopct='%1.1f%%', colors=["green", "red"], startangle=90)
-    plt.title(f"Success Rate: {success_rate:.2f}%")
-    st.pyplot(fig)
+    fig = px.pie(
+        names=["Success", "Error"],
+        values=[success_rate, error_rate],
+        color=["Success", "Error"],
+        color_discrete_map={"Success": "green", "Error": "red"},
+        title=f"Success Rate: {success_rate:.2f}%",
+    )
+    st.plotly_chart(fig)
 
     # Plot Latency vs Status Code
-    latency_df = pd.DataFrame({"Latency": latencies, "Status": statuses})
+    latency_df = pd.DataFrame({"Latency": clean_latencies, "Status": statuses[valid]})
     fig = px.box(latency_df, x="Status", y="Latency", title="Latency by Status Code", points="all")
     st.plotly_chart(fig)
 
@@ -143,35 +281,27 @@ uploaded_file = st.file_uploader("📤 Upload your Postman/OpenAPI JSON file", t
 
 if uploaded_file:
     try:
-        data = json.load(uploaded_file)
-        folder_api_map = defaultdict(list)
-        total = 0
-        all_variables = set()
-
-        if "item" in data:
-            folder_api_map, total, all_variables = parse_postman(data)
+        blob = uploaded_file.getvalue()
+        file_format, folder_api_map, total, all_variables, flat_apis = parse_upload(blob)
+        if file_format == "item":
             st.subheader("📂 Postman Collection: Folder-wise APIs")
-        elif "paths" in data:
-            folder_api_map, total, all_variables = parse_openapi(data)
+        elif file_format == "paths":
             st.subheader("📂 OpenAPI/Swagger: Tag-wise APIs")
         else:
             st.error("❌ Unsupported format. Please upload a valid Postman or OpenAPI JSON file.")
 
         search_term = st.text_input("🔍 Search for API (by name or method)")
-        filtered_apis = defaultdict(list)
-        for folder, apis in folder_api_map.items():
-            for api in apis:
-                if search_term.lower() in api["name"].lower():
-                    filtered_apis[folder].append(api)
+        filtered_apis = filter_apis(flat_apis, search_term)
 
-        for folder, apis in filtered_apis.items():
+        for folder, group in groupby(filtered_apis, key=itemgetter(0)):
+            apis = [api for _, api in group]
             with st.expander(f"📁 {folder} — {len(apis)} APIs"):
                 for api in apis:
                     st.markdown(f"**• {api['name']}**")
                     if api.get("path"):
                         st.markdown(f"  - 🌐 Path: `{api['path']}`")
                     if api.get("variables"):
-                        st.markdown(f"  - 🔑 Env Vars: `{', '.join(api['variables'])}`")
+                        st.markdown(f"  - 🔑 Env Vars: `{', '.join(sorted(api['variables']))}`")
                     if api.get("body"):
                         st.markdown("  - 📦 Request Body:")
                         st.code(api["body"], language="json")
@@ -180,45 +310,27 @@ if uploaded_file:
         if all_variables:
             st.info(f"🌐 Unique environment variables used: `{', '.join(sorted(all_variables))}`")
 
-        export_data = []
-        for folder, apis in filtered_apis.items():
-            for api in apis:
-                export_data.append({
-                    "Folder/Tag": folder,
-                    "API Name": api["name"],
-                    "API Path": api.get("path", ""),
-                    "Env Variables": ", ".join(api.get("variables", [])),
-                    "Request Body": api.get("body", ""),
-                })
-
-        if export_data:
-            df = pd.DataFrame(export_data)
-            buffer = BytesIO()
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "API Details"
-            for row in dataframe_to_rows(df, index=False, header=True):
-                ws.append(row)
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-            for col in ws.columns:
-                max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
-                ws.column_dimensions[col[0].column_letter].width = max_length + 2
-            wb.save(buffer)
-            buffer.seek(0)
+        api_export = build_api_export(blob, search_term)
+        if api_export:
             st.download_button(
                 label="📥 Export as Excel",
-                data=buffer,
+                data=api_export,
                 file_name="api_details.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
 
         if st.button("🚀 Run Load Test (10k requests)"):
             st.info("Running load test... Please wait.")
-            test_urls = [api["path"] for folder in filtered_apis for api in filtered_apis[folder] if api.get("path", "").startswith("http")]
+            test_urls = [api["path"] for _, api in filtered_apis if api.get("path", "").startswith("http")]
             if not test_urls:
                 st.warning("No valid full URLs found for testing.")
             else:
+                import pandas as pd
+                from openpyxl import Workbook
+                from openpyxl.utils.dataframe import dataframe_to_rows
+                from openpyxl.styles import Font
+                from openpyxl.utils import get_column_letter
+
                 results, latencies, statuses = load_test(test_urls, num_requests=10000)
                 df_results = pd.DataFrame(results, columns=["URL", "Status", "Latency (ms)"])
                 st.dataframe(df_results.head(100))
@@ -226,13 +338,17 @@ if uploaded_file:
                 wb = Workbook()
                 ws = wb.active
                 ws.title = "Load Test Results"
+                widths = [0] * len(df_results.columns)
                 for row in dataframe_to_rows(df_results, index=False, header=True):
                     ws.append(row)
+                    for i, value in enumerate(row):
+                        length = len(str(value)) if value else 0
+                        if length > widths[i]:
+                            widths[i] = length
                 for cell in ws[1]:
                     cell.font = Font(bold=True)
-                for col in ws.columns:
-                    max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
-                    ws.column_dimensions[col[0].column_letter].width = max_length + 2
+                for i, width in enumerate(widths, 1):
+                    ws.column_dimensions[get_column_letter(i)].width = width + 2
                 wb.save(buffer)
                 buffer.seek(0)
                 st.download_button(